@@ -11,7 +11,23 @@
 
 
 import sys
-import copy
+from array import array
+from collections import deque
+
+
+# Cost stored in the routing tables for destinations a node has no route to
+INFINITY = sys.maxsize
+
+
+def label_order(label):
+    """
+    @brief Sort key for node labels: numeric labels compare by their value and come before any other labels.
+
+    @param label: The node label read from an input file.
+
+    @return: A tuple that orders the label.
+    """
+    return (0, int(label), label) if label.isdecimal() else (1, 0, label)
 
 
 class NetworkSimulator:
@@ -23,7 +39,8 @@ class NetworkSimulator:
 
     messages: array of tuples containing source node, destination node, and actual message
     changes: array of tuples containing 2 nodes and their updated path cost
-    routing_tables: 2D array with each entry being the cost and next hop of one node to another
+    costs: array indexed by node ID of packed arrays holding the path cost to every destination ID
+    next_hops: array indexed by node ID of packed arrays holding the next hop ID towards every destination ID
     """
 
 
@@ -31,10 +48,13 @@ class NetworkSimulator:
         """
         @brief Initializes the NetworkSimulator object.
 
-        topology: map mapping nodes to each other including their path costs
+        topology: array indexed by node ID of maps from neighbor IDs to path costs
+        name_of: array mapping node IDs back to the node labels used in the input files
+        id_of: map from node labels to node IDs
         messages: array of tuples containing source node, destination node, and actual message
         changes: array of tuples containing 2 nodes and their updated path cost
-        routing_tables: 2D array with each entry being the cost and next hop of one node to another
+        costs: array indexed by node ID of packed arrays holding the path cost to every destination ID, or INFINITY
+        next_hops: array indexed by node ID of packed arrays holding the next hop ID towards every destination ID, or -1
 
         @param topology_file: The path to the file containing network topology.
         @param messages_file: The path to the file containing messages to be sent.
@@ -45,24 +65,36 @@ class NetworkSimulator:
         self.topology = self.read_topology(topology_file)
         self.messages = self.read_messages(messages_file)
         self.changes = self.read_changes(changes_file)
-        self.routing_tables = {node: {node: (0, node)} for node in self.topology}
+        node_count = len(self.topology)
+        self.costs = [array('q', [INFINITY]) * node_count for _ in range(node_count)]
+        self.next_hops = [array('i', [-1]) * node_count for _ in range(node_count)]
+        for node in range(node_count):
+            self.costs[node][node] = 0
+            self.next_hops[node][node] = node
 
 
     def read_topology(self, file_path):
         """
-        @brief Reads network topology from initial topology file into the topology map, and set path costs for nodes
+        @brief Reads network topology from initial topology file into the topology array, and set path costs for nodes
+        Node labels are interned to contiguous integer IDs in label order (see label_order), so comparing two IDs
+        gives the same result as comparing their labels.
 
         @param file_path: The path to the file containing network topology.
 
-        @return: A map representing the network topology.
+        @return: An array indexed by node ID representing the network topology.
         """
-        topology = {}
         with open(file_path, 'r') as file:
-            for line in file:
-                node1, node2, cost = line.strip().split()
-                cost = int(cost)
-                topology.setdefault(node1, {})[node2] = cost
-                topology.setdefault(node2, {})[node1] = cost
+            lines = file.read().splitlines()
+        # Each line is a "node1 node2 cost" link
+        links = [(node1, node2, int(cost)) for node1, node2, cost in map(str.split, lines)]
+
+        self.name_of = sorted({node for node1, node2, _ in links for node in (node1, node2)}, key=label_order)
+        self.id_of = {name: node for node, name in enumerate(self.name_of)}
+        topology = [{} for _ in self.name_of]
+        for node1, node2, cost in links:
+            node1, node2 = self.id_of[node1], self.id_of[node2]
+            topology[node1][node2] = cost
+            topology[node2][node1] = cost
         return topology
 
 
@@ -74,11 +106,12 @@ class NetworkSimulator:
 
         @return: An array of tuples representing messages.
         """
-        messages = []
         with open(file_path, 'r') as file:
-            for line in file:
-                source, destination, message = line.strip().split(' ', 2)
-                messages.append((source, destination, message))
+            lines = file.read().splitlines()
+        messages = []
+        for line in lines:
+            source, destination, message = line.strip().split(' ', 2)
+            messages.append((source, destination, message))
         return messages
 
 
@@ -90,82 +123,246 @@ class NetworkSimulator:
 
         @return: An array of tuples representing changes.
         """
-        changes = []
         with open(file_path, 'r') as file:
-            for line in file:
-                node1, node2, cost = line.strip().split()
-                changes.append((node1, node2, int(cost)))
-        return changes
+            lines = file.read().splitlines()
+        # Each line is a "node1 node2 cost" change
+        return [(node1, node2, int(cost)) for node1, node2, cost in map(str.split, lines)]
+
+
+    def known_destinations(self, node):
+        """
+        @brief Lists the destinations a node currently has a route to.
 
+        @param node: The node ID.
 
-    def dvr_convergence(self):
+        @return: The set of destination IDs with a finite cost in the node's routing table.
+        """
+        return {dest for dest, cost in enumerate(self.costs[node]) if cost != INFINITY}
+
+
+    def dvr_convergence(self, pending=None):
         """
         @brief Performs Distance Vector Routing convergence when there is a network change applied.
-        Keeps updating routing tables until no more changes were applied after an iteration 
+        Uses a FIFO queue of nodes whose routing tables changed (SPFA-style Bellman-Ford): a queued node only
+        advertises the destinations that changed since it was queued, and only to its neighbors.
 
-        @return Void
+        @param pending: Map from the nodes to start from to the destinations they should advertise. If None, every
+        node advertises its whole routing table.
+
+        @return: True if any routing table entry was updated, False otherwise.
         """
-        changed = True
-        while changed:
-            changed = False
-            # Copy the current state of routing tables to compare after potential updates
-            previous_routing_tables = copy.deepcopy(self.routing_tables)
-            for node, neighbors in self.topology.items():
-                # updates routing tables based on nodes' neighbors
-                if self.update_routing_table(node, neighbors):
-                    changed = True
-            # Check if any routing table has actually changed
-            if previous_routing_tables == self.routing_tables:
-                changed = False
+        if pending is None:
+            pending = {node: self.known_destinations(node) for node in range(len(self.topology))}
+        queue = deque(pending)
+        changed = False
+        while queue:
+            node = queue.popleft()
+            destinations = pending.pop(node)
+            for neighbor, link_cost in self.topology[node].items():
+                updated = self.update_routing_table(neighbor, node, link_cost, destinations)
+                if not updated:
+                    continue
+                changed = True
+                if neighbor in pending:
+                    pending[neighbor] |= updated
+                else:
+                    pending[neighbor] = updated
+                    queue.append(neighbor)
+        return changed
 
 
-    def update_routing_table(self, node, neighbors):
+    def update_routing_table(self, node, neighbor, link_cost, destinations):
         """
-        @brief Updates the routing table for a node based on its neighbors and path costs to neighbors
+        @brief Updates the routing table for a node based on the routes advertised by one of its neighbors
 
         @param node: The node for which to update the routing table.
-        @param neighbors: The neighbors of the node.
-        @return: True if the routing table was updated, False otherwise.
-        """
-        updated = False
-        for neighbor, link_cost in neighbors.items():
-            for dest, (neighbor_total_cost, next_hop) in self.routing_tables[neighbor].items():
-                new_cost = link_cost + neighbor_total_cost
-                # Check if a better path is found or if the same-cost path has a lower next-hop ID
-                if dest not in self.routing_tables[node] or new_cost < self.routing_tables[node][dest][0]:
-                    self.routing_tables[node][dest] = (new_cost, neighbor)
-                    updated = True
-                elif new_cost == self.routing_tables[node][dest][0]:
-                    # Tie breaking: only update if the new next-hop ID is lower
-                    if neighbor < next_hop:
-                        self.routing_tables[node][dest] = (new_cost, neighbor)
-                        updated = True
+        @param neighbor: The neighbor advertising its routes.
+        @param link_cost: The path cost of the link between the node and the neighbor.
+        @param destinations: The destinations in the neighbor's routing table to consider.
+        @return: The set of destinations whose routing table entry was updated.
+        """
+        # Bind the rows once; this loop runs for every advertised destination of every relaxed link
+        costs = self.costs[node]
+        next_hops = self.next_hops[node]
+        neighbor_costs = self.costs[neighbor]
+        updated = set()
+        for dest in destinations:
+            # A node's route to itself never changes, even through a zero-cost link
+            if dest == node:
+                continue
+            new_cost = link_cost + neighbor_costs[dest]
+            current_cost = costs[dest]
+            # Take a better path, or a same-cost path whose next-hop ID is lower than the current one.
+            # A zero-cost tie must not take a route that leads back through this node
+            if new_cost < current_cost or (new_cost == current_cost and neighbor < next_hops[dest]
+                                           and (link_cost or not self.route_passes(neighbor, node, dest))):
+                costs[dest] = new_cost
+                next_hops[dest] = neighbor
+                updated.add(dest)
         return updated
 
 
+    def route_passes(self, start, node, dest):
+        """
+        @brief Checks whether the route of one node towards a destination passes through another node
+
+        @param start: The node whose route is followed.
+        @param node: The node to look for on the route.
+        @param dest: The destination of the route.
+        @return: True if following the next hops from start reaches node before dest, False otherwise.
+        """
+        current = start
+        while current != dest:
+            if current == node:
+                return True
+            current = self.next_hops[current][dest]
+        return False
+
+
+    def invalidate_routes(self, node1, node2):
+        """
+        @brief Removes every routing table entry whose path crosses the link between two nodes.
+        A route crosses the link if following the next hops towards its destination reaches node1 with next hop node2,
+        or node2 with next hop node1.
+
+        @param node1: The first node of the link.
+        @param node2: The second node of the link.
+
+        @return: Map from the nodes that should re-advertise routes to the destinations they should advertise.
+        """
+        costs, next_hops = self.costs, self.next_hops
+        node_count = len(self.topology)
+        lost = []
+        for dest in range(node_count):
+            # Whether the route of a node to dest crosses the link, filled in as next hops are followed
+            crosses = {dest: False}
+            for node in range(node_count):
+                path = []
+                on_path = set()
+                current = node
+                while current not in crosses:
+                    on_path.add(current)
+                    next_hop = next_hops[current][dest]
+                    if next_hop == -1:
+                        crosses[current] = False
+                    elif (current, next_hop) in ((node1, node2), (node2, node1)):
+                        crosses[current] = True
+                    elif next_hop in on_path:
+                        # A walk that loops never reaches dest; the route is dropped like a crossing one so that
+                        # convergence rebuilds it
+                        crosses[current] = True
+                    else:
+                        path.append(current)
+                        current = next_hop
+                for visited in path:
+                    crosses[visited] = crosses[current]
+            for node, crossed in crosses.items():
+                if crossed:
+                    costs[node][dest] = INFINITY
+                    next_hops[node][dest] = -1
+                    lost.append((node, dest))
+
+        # Neighbors that still have a route re-advertise it to the nodes that lost theirs
+        pending = {}
+        for node, dest in lost:
+            for neighbor in self.topology[node]:
+                if costs[neighbor][dest] != INFINITY:
+                    pending.setdefault(neighbor, set()).add(dest)
+        return pending
+
+
+    def apply_change(self, node1, node2, new_cost):
+        """
+        @brief Applies a link change to the topology and reconverges the routing tables.
+        A cheaper or new link can only shorten paths, so the converged tables are kept and only the two endpoints
+        re-advertise their routes. A more expensive or removed link only invalidates the routes that cross it; their
+        neighbors re-advertise and the remaining entries are kept.
+
+        @param node1: The label of the first node of the changed link.
+        @param node2: The label of the second node of the changed link.
+        @param new_cost: The new path cost of the link, or -999 if the link is removed.
+
+        @return: True if the routing tables may have changed, False if they are known to be unchanged.
+        """
+        node1, node2 = self.id_of[node1], self.id_of[node2]
+        old_cost = self.topology[node1].get(node2)
+        if new_cost == -999:
+            if old_cost is None:
+                return False
+            self.topology[node1].pop(node2)
+            self.topology[node2].pop(node1)
+        else:
+            if new_cost == old_cost:
+                return False
+            self.topology[node1][node2] = new_cost
+            self.topology[node2][node1] = new_cost
+
+        if new_cost != -999 and (old_cost is None or new_cost < old_cost):
+            return self.dvr_convergence({
+                node1: self.known_destinations(node1),
+                node2: self.known_destinations(node2),
+            })
+
+        # Any route crossing the link starts crossing it at one of its endpoints, so if neither endpoint routes over
+        # the link, a costlier or removed link leaves every route untouched
+        if node2 not in self.next_hops[node1] and node1 not in self.next_hops[node2]:
+            return False
+        self.dvr_convergence(self.invalidate_routes(node1, node2))
+        return True
+
+
     def simulate_messages(self):
         """
         @brief Simulates message forwarding in the network by traversing the next hops of path nodes
 
         @return: A list of strings representing the simulated messages sent with source, destination, cost, and hop path.
         """
+        name_of = self.name_of
+        # A loop-free path visits every node at most once
+        max_hops = len(name_of)
         message_paths = []
         for source, destination, message_text in self.messages:
-            if destination in self.routing_tables[source]:
-                path_cost, _ = self.routing_tables[source][destination]
-                path = [source]
-                next_hop = self.routing_tables[source][destination][1]
-                while next_hop != destination:
-                    path.append(next_hop)
-                    next_hop = self.routing_tables[next_hop][destination][1]
-                # Adjusting the path output to exclude the destination and match the example
-                hops_path = ' '.join(path) if len(path) > 1 else "unreachable"
+            source_id = self.id_of[source]
+            destination_id = self.id_of.get(destination)
+            if destination_id is not None and self.costs[source_id][destination_id] != INFINITY:
+                path_cost = self.costs[source_id][destination_id]
+                next_hop = self.next_hops[source_id][destination_id]
+                path = [None] * max_hops
+                path[0] = source
+                hops = 1
+                while next_hop != destination_id and hops < max_hops:
+                    path[hops] = name_of[next_hop]
+                    next_hop = self.next_hops[next_hop][destination_id]
+                    hops += 1
+                # Adjusting the path output to exclude the destination and match the example; a walk that never
+                # reaches the destination means the next hops loop
+                hops_path = ' '.join(path[:hops]) if hops > 1 and next_hop == destination_id else "unreachable"
                 message_paths.append(f"from {source} to {destination} cost {path_cost} hops {hops_path} message {message_text}")
             else:
                 message_paths.append(f"from {source} to {destination} cost infinite hops unreachable message {message_text}")
         return message_paths
 
 
+    def format_routing_table(self):
+        """
+        @brief Formats the routing tables of nodes in sorted order (by node ID).
+
+        @return: A string with a "destination next_hop cost" line per routing table entry and a blank line after each node.
+        """
+        name_of = self.name_of
+        # Node IDs are assigned in label order, so walking the IDs in order needs no sorting
+        nodes = range(len(name_of))
+        lines = []
+        for costs, next_hops in zip(self.costs, self.next_hops):
+            for destination in nodes:
+                cost = costs[destination]
+                if cost == INFINITY:
+                    continue
+                lines.append(f"{name_of[destination]} {name_of[next_hops[destination]]} {cost}\n")
+            lines.append("\n")
+        return "".join(lines)
+
+
     def print_routing_table(self, file=None):
         """
         @brief Writes the routing tables of nodes in sorted order (by node ID) to a file.
@@ -174,16 +371,27 @@ class NetworkSimulator:
 
         @return Void
         """
-        for node in sorted(self.routing_tables.keys()):
-            for destination in sorted(self.routing_tables[node].keys()):
-                cost, next_hop = self.routing_tables[node][destination]
-                print(f"{destination} {next_hop} {cost}", file=file)
-            print(file=file)
+        print(self.format_routing_table(), end='', file=file)
+
+
+    def format_simulation_step(self):
+        """
+        @brief Formats the routing tables followed by the simulated messages for the current network state.
+
+        @return: The output of one simulation step as a single string.
+        """
+        output = self.format_routing_table()
+        message_paths = self.simulate_messages()
+        if message_paths:
+            output += "\n".join(message_paths) + "\n"
+        return output
 
 
     def run_simulation(self, output_file):
         """
         @brief Runs the network simulation, send messages, apply network changes, and writes each node's forwarding table and messages sent to the output file.
+        Each simulation step is formatted in memory and written with a single call; a change that leaves the routing
+        tables untouched reuses the output of the previous step.
 
         @param output_file: The path to the output file.
 
@@ -191,37 +399,15 @@ class NetworkSimulator:
         """
         with open(output_file, 'w') as f:
             self.dvr_convergence()
-            # Print the initial routing tables directly without a preceding newline.
-            self.print_routing_table(f)
-            
-            # Simulate and print initial messages.
-            initial_message_simulation = self.simulate_messages()
-            if initial_message_simulation:
-                # Print a newline only if there are initial messages to ensure separation.
-                print("\n".join(initial_message_simulation), file=f)
-
-            for change in self.changes:
-                node1, node2, new_cost = change
-                if new_cost == -999:
-                    self.topology[node1].pop(node2, None)
-                    self.topology[node2].pop(node1, None)
-                else:
-                    self.topology[node1][node2] = new_cost
-                    self.topology[node2][node1] = new_cost
-
-                self.routing_tables = {node: {node: (0, node)} for node in self.topology}
-                self.dvr_convergence()
-
-                # The newline is printed here to separate the sections correctly.
-                print(file=f)
-
-                self.print_routing_table(f)
-
-                # Simulate and print messages after change.
-                messages_after_change = self.simulate_messages()
-                if messages_after_change:
-                    # Print a newline only if there are messages after the change to ensure proper separation.
-                    print("\n".join(messages_after_change), file=f)
+            # Write the initial routing tables and messages directly without a preceding newline.
+            step_output = self.format_simulation_step()
+            f.write(step_output)
+
+            for node1, node2, new_cost in self.changes:
+                if self.apply_change(node1, node2, new_cost):
+                    step_output = self.format_simulation_step()
+                # The newline is written here to separate the sections correctly.
+                f.write("\n" + step_output)
 
 def main(argv):
     """
@@ -35,11 +35,17 @@ class Network:
     @brief Represents the entire network.
 
     @param nodes: Dictionary containing all nodes in the network, mapping node Id to node object
+    @param node_ids: List of node IDs in sorted order; the position of an ID is its dense index
+    @param index_of: Dictionary mapping node IDs to their dense index
+    @param adjacency: List indexed by dense index of (neighbor index, cost) pairs, built by finalize()
     """
 
 
     def __init__(self):
         self.nodes = {} 
+        self.node_ids = []
+        self.index_of = {}
+        self.adjacency = []
 
 
     def add_link(self, node1_id, node2_id, cost):
@@ -60,61 +66,176 @@ class Network:
         self.nodes[node2_id].links[node1_id] = cost
 
 
-def dijkstra(network, start_id):
+    def finalize(self):
+        """
+        @brief Builds the dense representation of the network used by dijkstra.
+        Node IDs are mapped to dense indices in sorted order and every node's links become a list of
+        (neighbor index, cost) pairs. Must be called again after the links change.
+
+        @return Void
+        """
+        # Nodes are never removed, so the sorted IDs only need refreshing when a link added a new node
+        if len(self.node_ids) != len(self.nodes):
+            self.node_ids = sorted(self.nodes)
+            self.index_of = {node_id: index for index, node_id in enumerate(self.node_ids)}
+        self.adjacency = [
+            [(self.index_of[neighbor_id], cost) for neighbor_id, cost in self.nodes[node_id].links.items()]
+            for node_id in self.node_ids
+        ]
+
+
+def dijkstra(network, start, finalized=None):
     """
     @brief Computes shortest paths from one node to all other nodes using Dijkstra's algorithm.
 
-    @param network: The Network object representing the network.
-    @param start_id: The identifier of the starting node.
-
-    @return distances: Dictionary containing distances from the starting node to each node.
-    @return previous_nodes: Dictionary containing previous nodes in the shortest paths.
-    @return full_paths: Dictionary containing full paths from the starting node to each node.
-    """
-    distances = {node_id: float('inf') for node_id in network.nodes}
-    distances[start_id] = 0
-    previous_nodes = {node_id: None for node_id in network.nodes}
-    full_paths = {node_id: [] for node_id in network.nodes}  # Initialize full paths
-    full_paths[start_id] = [start_id]  # Path to itself
-
-    pq = [(0, start_id, [start_id])]  # Include start path in priority queue
-    while pq:
-        current_distance, current_node, current_path = heapq.heappop(pq)
-        if current_distance > distances[current_node]:
-            continue
-        
-        for neighbor, weight in network.nodes[current_node].links.items():
-            distance = current_distance + weight
-            if distance < distances[neighbor]:
-                distances[neighbor] = distance
-                previous_nodes[neighbor] = current_node
-                new_path = current_path + [neighbor]  # Construct new path
-                full_paths[neighbor] = new_path  # Update full path
-                heapq.heappush(pq, (distance, neighbor, new_path))
-    
-    return distances, previous_nodes, full_paths
+    @param network: The finalized Network object representing the network.
+    @param start: The dense index of the starting node.
+    @param finalized: Optional scratch list with one entry per node, shared by consecutive calls. Every call marks its
+    finalized nodes with a token of its own, so the list never needs clearing between calls.
+
+    @return distances: List indexed by dense index containing distances from the starting node to each node.
+    @return previous_nodes: List indexed by dense index containing previous nodes in the shortest paths.
+    @return first_hops: List indexed by dense index containing the first node after the start on each shortest path.
+    """
+    adjacency = network.adjacency
+    node_count = len(adjacency)
+    distances = [float('inf')] * node_count
+    distances[start] = 0
+    previous_nodes = [None] * node_count
+    first_hops = [None] * node_count
+    first_hops[start] = start
+    if finalized is None:
+        finalized = [None] * node_count
+    run = object()
+
+    # Heap entries are single ints encoding (distance, node) as distance * node_count + node: they order exactly like
+    # the tuples would, without allocating a tuple per push
+    pq = []
+    entry = start
+    while entry is not None:
+        current_distance, current_node = divmod(entry, node_count)
+        improved = None
+        # Stale heap entries belong to nodes that were already popped at their final distance
+        if finalized[current_node] is not run:
+            finalized[current_node] = run
+            for neighbor, weight in adjacency[current_node]:
+                distance = current_distance + weight
+                if distance < distances[neighbor]:
+                    distances[neighbor] = distance
+                    previous_nodes[neighbor] = current_node
+                    # Neighbors of the start are their own first hop; everything else inherits it
+                    first_hops[neighbor] = neighbor if current_node == start else first_hops[current_node]
+                    if improved is not None:
+                        heapq.heappush(pq, improved)
+                    improved = distance * node_count + neighbor
+
+        # Push the last improvement and pop the next entry in a single heap operation
+        if improved is not None:
+            entry = heapq.heappushpop(pq, improved)
+        else:
+            entry = heapq.heappop(pq) if pq else None
+
+    return distances, previous_nodes, first_hops
+
+
+
+def build_routing_table(network, start, finalized=None):
+    """
+    @brief Builds the routing table of one node in the network.
+
+    @param network: The finalized Network object representing the network.
+    @param start: The dense index of the node.
+    @param finalized: Optional scratch list passed on to dijkstra.
+
+    @return routing_table: Tuple (costs, next_hops, previous_nodes) of lists indexed by the dense index of the
+    destination, holding the path cost (infinite if unreachable), the next hop and the previous node on the path.
+    """
+    distances, previous_nodes, first_hops = dijkstra(network, start, finalized)
+    return distances, first_hops, previous_nodes
 
 
+def path_hops(routing_table, dest):
+    """
+    @brief Reconstructs the hops of a shortest path by following previous nodes back from the destination.
+
+    @param routing_table: The routing table of the source node.
+    @param dest: The dense index of the destination node.
+
+    @return hops: List of dense indices from the source up to, but excluding, the destination.
+    """
+    previous_nodes = routing_table[2]
+    hops = []
+    previous_node = previous_nodes[dest]
+    while previous_node is not None:
+        hops.append(previous_node)
+        previous_node = previous_nodes[previous_node]
+    hops.reverse()
+    return hops
+
 
 def build_routing_tables(network):
     """
     @brief Builds routing tables for all nodes in the network.
 
-    @param network: The Network object representing the network.
+    @param network: The finalized Network object representing the network.
 
-    @return routing_tables: Dictionary containing routing tables for all nodes.
+    @return routing_tables: List indexed by dense index containing routing tables for all nodes.
     """
-    routing_tables = {}
-    for node_id in network.nodes:
-        distances, previous_nodes, full_paths = dijkstra(network, node_id)
-        routing_table = {}
-        for dest_id, path in full_paths.items():
-            if not path:
-                continue
-            cost = distances[dest_id]
-            next_hop = path[1] if len(path) > 1 else node_id
-            routing_table[dest_id] = (next_hop, cost, path[:-1])  # Store next_hop, cost, and path without destination
-        routing_tables[node_id] = routing_table
+    node_count = len(network.node_ids)
+    # One scratch list serves every Dijkstra run
+    finalized = [None] * node_count
+    return [build_routing_table(network, start, finalized) for start in range(node_count)]
+
+
+def link_change_affects(routing_table, index1, index2, old_cost, new_cost):
+    """
+    @brief Checks whether a link change can alter the shortest paths recorded in a node's routing table.
+
+    A cheaper or added link can only be used if it reaches one of its ends at most as cheaply as the current path does.
+    A costlier or removed link only matters if it is part of the node's shortest path tree. In every other case,
+    running Dijkstra again would produce exactly the same routing table.
+
+    @param routing_table: The routing table of the node before the change.
+    @param index1: The dense index of the first node of the link.
+    @param index2: The dense index of the second node of the link.
+    @param old_cost: The cost of the link before the change, or None if there was no link.
+    @param new_cost: The cost of the link after the change, or None if the link was removed.
+
+    @return True if the routing table has to be rebuilt, False otherwise.
+    """
+    costs, _, previous_nodes = routing_table
+    if new_cost is not None and (old_cost is None or new_cost < old_cost):
+        cost1, cost2 = costs[index1], costs[index2]
+        if cost1 == float('inf') and cost2 == float('inf'):
+            return False
+        return cost1 + new_cost <= cost2 or cost2 + new_cost <= cost1
+
+    # The link is in the shortest path tree if one of its ends is the previous node of the other
+    return previous_nodes[index2] == index1 or previous_nodes[index1] == index2
+
+
+def update_routing_tables(network, routing_tables, node1_id, node2_id, old_cost, new_cost):
+    """
+    @brief Updates routing tables after a single link change, rebuilding only the tables the change can affect.
+
+    @param network: The finalized Network object after the change.
+    @param routing_tables: List containing routing tables for all nodes before the change, updated in place.
+    @param node1_id: The identifier of the first node of the changed link.
+    @param node2_id: The identifier of the second node of the changed link.
+    @param old_cost: The cost of the link before the change, or None if there was no link.
+    @param new_cost: The cost of the link after the change, or None if the link was removed.
+
+    @return routing_tables: List indexed by dense index containing routing tables for all nodes.
+    """
+    # A new node shifts the dense indices of the nodes sorted after it, so every table is rebuilt
+    if len(routing_tables) != len(network.node_ids):
+        return build_routing_tables(network)
+
+    index1, index2 = network.index_of[node1_id], network.index_of[node2_id]
+    finalized = [None] * len(routing_tables)
+    for start, routing_table in enumerate(routing_tables):
+        if link_change_affects(routing_table, index1, index2, old_cost, new_cost):
+            routing_tables[start] = build_routing_table(network, start, finalized)
     return routing_tables
 
 
@@ -128,33 +249,63 @@ def read_topology(file_name, network):
     @return Void
     """
     with open(file_name, 'r') as file:
-        for line in file:
-            node1_id, node2_id, cost = map(int, line.split())
-            network.add_link(node1_id, node2_id, cost)
+        lines = file.read().splitlines()
+    for line in lines:
+        node1_id, node2_id, cost = map(int, line.split())
+        network.add_link(node1_id, node2_id, cost)
 
 
-def forward_messages(file_name, routing_tables, file_path):
+def read_messages(file_name):
     """
-    @brief Forwards messages based on routing tables and writes results to an output file
+    @brief Reads the messages to forward from a file.
+    The parts of a message's output line that do not depend on the routing tables are assembled here once, since the
+    same messages are forwarded after every change.
 
     @param file_name: The name of the file containing messages.
-    @param routing_tables: Dictionary mapping source IDs to their routing tables.
-    @param file_path: The path of the output file to write the forwarded messages.
 
-    @return Void
+    @return messages: List/Array of tuples representing messages in the format (source_id, dest_id, head, tail), where
+    head is the output line up to the cost and tail is the output line from the message text onwards.
     """
-    with open(file_name, 'r') as msg_file, open(file_path, 'a') as out_file:
-        for line in msg_file:
+    messages = []
+    with open(file_name, 'r') as file:
+        for line in file:
             source_id, dest_id, message = line.split(maxsplit=2)
             source_id, dest_id = int(source_id), int(dest_id)
-            # Directly use routing_tables, which maps source IDs to their routing tables
-            if source_id in routing_tables and dest_id in routing_tables[source_id]:
-                next_hop, cost, path = routing_tables[source_id][dest_id]
-                hops = " ".join(map(str, path))  # path is already calculated in build_routing_tables
-                out_file.write(f"from {source_id} to {dest_id} cost {cost} hops {hops} message {message.strip()}\n")
+            messages.append((source_id, dest_id, f"from {source_id} to {dest_id} cost ", f" message {message.strip()}\n"))
+    return messages
+
+
+def forward_messages(network, messages, routing_tables, out_file):
+    """
+    @brief Forwards messages based on routing tables and writes results to an output file
+    The results are collected in memory and written with a single call.
+
+    @param network: The finalized Network object the routing tables were built for.
+    @param messages: List of (source_id, dest_id, head, tail) tuples, as returned by read_messages.
+    @param routing_tables: List indexed by dense index containing routing tables for all nodes.
+    @param out_file: The open output file to write the forwarded messages to.
+
+    @return Void
+    """
+    node_ids, index_of = network.node_ids, network.index_of
+    parts = []
+    # Messages often repeat a (source, destination) pair; its route fragment is built once per pass
+    hop_cache = {}
+    for source_id, dest_id, head, tail in messages:
+        route = hop_cache.get((source_id, dest_id))
+        if route is None:
+            source, dest = index_of.get(source_id), index_of.get(dest_id)
+            # Look the route up by dense index; unknown nodes and infinite costs are unreachable
+            if source is not None and dest is not None and routing_tables[source][0][dest] != float('inf'):
+                routing_table = routing_tables[source]
+                hops = " ".join(str(node_ids[hop]) for hop in path_hops(routing_table, dest))
+                route = f"{routing_table[0][dest]} hops {hops}"
             else:
-                out_file.write(f"from {source_id} to {dest_id} cost infinite hops unreachable message {message.strip()}\n")
-        out_file.write("\n")
+                route = "infinite hops unreachable"
+            hop_cache[source_id, dest_id] = route
+        parts.append(f"{head}{route}{tail}")
+    parts.append("\n")
+    out_file.write("".join(parts))
 
 
 def read_changes(change_file):
@@ -165,28 +316,36 @@ def read_changes(change_file):
 
     @return changes: List/Array of tuples representing changes in the format (node1_id, node2_id, cost).
     """
-    changes = []
     with open(change_file, 'r') as file:
-        for line in file:
-            parts = line.split()
-            if len(parts) == 3:
-                node1_id, node2_id, cost = map(int, parts)
-                changes.append((node1_id, node2_id, cost))
+        lines = file.read().splitlines()
+    changes = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3:
+            node1_id, node2_id, cost = map(int, parts)
+            changes.append((node1_id, node2_id, cost))
     return changes
 
 
-def write_forwarding_tables(routing_tables, file_path):
+def write_forwarding_tables(network, routing_tables, file):
     """
     @brief Writes routing tables to an output file.
+    The tables are collected in memory and written with a single call.
 
-    @param routing_tables: Dictionary containing routing tables for all nodes.
-    @param file_path: The path of the output file.
+    @param network: The finalized Network object the routing tables were built for.
+    @param routing_tables: List indexed by dense index containing routing tables for all nodes.
+    @param file: The open output file.
     """
-    with open(file_path, 'a') as file:
-        for node_id in sorted(routing_tables.keys()):
-            for dest_id, (next_hop, cost, _) in sorted(routing_tables[node_id].items()):
-                file.write(f"{dest_id} {next_hop} {cost}\n")
-            file.write("\n")
+    node_ids = network.node_ids
+    parts = []
+    # Dense indices follow sorted node ID order, for the sources as well as the destinations
+    for costs, next_hops, _ in routing_tables:
+        for dest, cost in enumerate(costs):
+            if cost == float('inf'):
+                continue
+            parts.append(f"{node_ids[dest]} {node_ids[next_hops[dest]]} {cost}\n")
+        parts.append("\n")
+    file.write("".join(parts))
 
 
 def main(topology_file, message_file, change_file, output_file):
@@ -201,34 +360,41 @@ def main(topology_file, message_file, change_file, output_file):
     @param output_file: The name of the output file to write the simulation results.
     """
 
-    # Open output file and erase file content if there are any
-    with open(output_file, 'w') as file:
-        file.truncate()
-
-    network = Network()
-    read_topology(topology_file, network)
-    routing_tables = build_routing_tables(network)
-    
-    # Write initial forwarding tables to the output file
-    write_forwarding_tables(routing_tables, output_file)
-    
-    # Forward messages based on initial routing tables
-    forward_messages(message_file, routing_tables, output_file)
-    
-    # Handle topology changes and update output after each change
-    changes = read_changes(change_file)
-    for node1_id, node2_id, cost in changes:
-        # update node link path
-        if cost == -999:  # Link removal
-            if node1_id in network.nodes and node2_id in network.nodes[node1_id].links:
-                del network.nodes[node1_id].links[node2_id]
-                del network.nodes[node2_id].links[node1_id]
-        else:  # Link addition or update
-            network.add_link(node1_id, node2_id, cost)
-
-        routing_tables = build_routing_tables(network) # Re-compute routing tables after change
-        write_forwarding_tables(routing_tables, output_file)  # Append updated tables to output file
-        forward_messages(message_file, routing_tables, output_file)  # Forward messages based on updated tables
+    # Open the output file once, erasing its content if there is any
+    with open(output_file, 'w') as out_file:
+        network = Network()
+        read_topology(topology_file, network)
+        network.finalize()
+        routing_tables = build_routing_tables(network)
+        # Messages are the same for every phase, so they are parsed only once
+        messages = read_messages(message_file)
+
+        # Write initial forwarding tables to the output file
+        write_forwarding_tables(network, routing_tables, out_file)
+
+        # Forward messages based on initial routing tables
+        forward_messages(network, messages, routing_tables, out_file)
+
+        # Handle topology changes and update output after each change
+        changes = read_changes(change_file)
+        for node1_id, node2_id, cost in changes:
+            old_cost = network.nodes[node1_id].links.get(node2_id) if node1_id in network.nodes else None
+            # update node link path
+            if cost == -999:  # Link removal
+                new_cost = None
+                if old_cost is not None:
+                    del network.nodes[node1_id].links[node2_id]
+                    del network.nodes[node2_id].links[node1_id]
+            else:  # Link addition or update
+                new_cost = cost
+                network.add_link(node1_id, node2_id, cost)
+
+            # Re-compute the routing tables the change can affect
+            if new_cost != old_cost:
+                network.finalize()
+                routing_tables = update_routing_tables(network, routing_tables, node1_id, node2_id, old_cost, new_cost)
+            write_forwarding_tables(network, routing_tables, out_file)  # Append updated tables to output file
+            forward_messages(network, messages, routing_tables, out_file)  # Forward messages based on updated tables
 
 
 if __name__ == "__main__":